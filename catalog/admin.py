@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Prefetch
 
 # Register your models here.
 from .models import Author, Genre, Book, BookInstance, Language
@@ -15,6 +16,11 @@ class BookAdmin(admin.ModelAdmin):
     list_display = ('title', 'author', 'display_genre')
     inlines = [BooksInstanceInline]
 
+    def get_queryset(self, request):
+        # Fetch the authors and genres of the whole page at once instead of once per row.
+        return super().get_queryset(request).select_related('author').prefetch_related(
+            Prefetch('genre', queryset=Genre.objects.only('name').order_by('name'), to_attr='prefetched_genres'))
+
 
 # admin.site.register(Author)
 # Define the admin class
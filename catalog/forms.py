@@ -3,10 +3,19 @@ from django.core.exceptions import ValidationError
 from django.utils.translation import ugettext_lazy as _
 import datetime  # for checking renewal date range.
 
+from .models import Author, Book, Genre, Language
+
+
+def proposed_renewal_date():
+    """Returns the default renewal date, 3 weeks from today."""
+    return datetime.date.today() + datetime.timedelta(weeks=3)
+
 
 class RenewBookForm(forms.Form):
     """Form for a librarian to renew books."""
-    renewal_date = forms.DateField(help_text="Enter a date between now and 4 weeks (default 3).")
+    # The callable initial is only evaluated when the field is rendered.
+    renewal_date = forms.DateField(initial=proposed_renewal_date,
+                                   help_text="Enter a date between now and 4 weeks (default 3).")
 
     def clean_renewal_date(self):
         data = self.cleaned_data['renewal_date']
@@ -21,3 +30,18 @@ class RenewBookForm(forms.Form):
 
         # Remember to always return the cleaned data.
         return data
+
+
+class BookForm(forms.ModelForm):
+    """Form for creating and updating books."""
+
+    class Meta:
+        model = Book
+        fields = ['title', 'author', 'summary', 'isbn', 'genre', 'language']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The choices only display the related objects' names, so don't fetch their other columns.
+        self.fields['author'].queryset = Author.objects.only('id', 'first_name', 'last_name')
+        self.fields['genre'].queryset = Genre.objects.only('id', 'name').order_by('name')
+        self.fields['language'].queryset = Language.objects.only('id', 'name')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from catalog.models import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = ('Recomputes the home page counters from the catalog, e.g. after bulk writes that bypassed them or after '
+            'the counter rows were removed.')
+
+    def handle(self, *args, **options):
+        for name, value in rebuild_counters().items():
+            self.stdout.write(f'{name}: {value}')
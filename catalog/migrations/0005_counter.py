@@ -0,0 +1,42 @@
+# Generated by Django 3.2.5 on 2026-10-15 00:52
+
+from django.db import migrations, models
+from django.db.models import Q
+
+# Mirrors catalog.models.INDEX_COUNTERS at the time of this migration.
+INDEX_COUNTERS = {
+    'num_books': ('Book', Q()),
+    'num_thrones_books': ('Book', Q(title__icontains='thrones')),
+    'num_instances': ('BookInstance', Q()),
+    'num_instances_available': ('BookInstance', Q(status__exact='a')),
+    'num_authors': ('Author', Q()),
+    'num_fantasy_genres': ('Genre', Q(name__icontains='fantasy')),
+}
+
+
+def create_counters(apps, schema_editor):
+    """Creates the home page counters, starting from the current contents of the catalog."""
+    Counter = apps.get_model('catalog', 'Counter')
+    Counter.objects.bulk_create([
+        Counter(name=name, value=apps.get_model('catalog', model_name).objects.filter(condition).count())
+        for name, (model_name, condition) in INDEX_COUNTERS.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_bookinstance_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.5 on 2026-10-15 00:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='book',
+            options={'ordering': ['title', 'author_id'], 'permissions': (('can_create_book', 'Create book'), ('can_update_book', 'Update book'), ('can_delete_book', 'Delete book'))},
+        ),
+    ]
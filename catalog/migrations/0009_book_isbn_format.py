@@ -0,0 +1,51 @@
+import re
+
+import django.core.validators
+from django.db import migrations, models
+
+ISBN_REGEX = r'^([0-9]{9}[0-9X]|[0-9]{13})$'
+
+
+def normalize_isbn(isbn):
+    """Returns isbn without hyphens or spaces and with an upper case X."""
+    return isbn.replace('-', '').replace(' ', '').upper()
+
+
+def normalize_isbns(apps, schema_editor):
+    """Makes the existing ISBNs satisfy the book_isbn_format constraint added below.
+
+    Separators are removed, but ISBNs that are still invalid without them are left for a librarian to correct: the
+    migration fails with a list of them rather than dropping catalog data.
+    """
+    Book = apps.get_model('catalog', 'Book')
+    books = list(Book.objects.exclude(isbn='').exclude(isbn__regex=ISBN_REGEX).only('isbn'))
+    invalid = [book for book in books if not re.match(ISBN_REGEX, normalize_isbn(book.isbn))]
+    if invalid:
+        raise ValueError('Correct or clear the ISBN of these books before migrating (pk: isbn):\n' +
+                         '\n'.join(f'{book.pk}: {book.isbn!r}' for book in invalid))
+    for book in books:
+        Book.objects.filter(pk=book.pk).update(isbn=normalize_isbn(book.isbn))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_book_author_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='book',
+            name='isbn',
+            field=models.CharField(blank=True, help_text='10 or 13 Characters <a href="https://www.isbn-international.org/content/what-isbn" target="_blank">ISBN number</a>', max_length=13, validators=[django.core.validators.RegexValidator('^([0-9]{9}[0-9X]|[0-9]{13})$', 'Enter a 10 or 13 character ISBN, without hyphens or spaces.')], verbose_name='ISBN'),
+        ),
+        migrations.RunPython(normalize_isbns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['isbn'], name='book_isbn_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='book',
+            constraint=models.CheckConstraint(check=models.Q(('isbn', ''), ('isbn__regex', '^([0-9]{9}[0-9X]|[0-9]{13})$'), _connector='OR'), name='book_isbn_format'),
+        ),
+    ]
@@ -16,6 +16,7 @@ genre defined by a particular record. No verbose name has been defined, so the f
 class Genre(models.Model):
     """Model representing a book genre (e.g. Science Fiction, Non Fiction)."""
     name = models.CharField(max_length=200, help_text="Enter a book genre (e.g. Science Fiction, French Poetry etc.)")
+    updated_at = models.DateTimeField(auto_now=True)  # Used to build the ETag of the list view
 
     class Meta:
         ordering = ['name']
@@ -50,6 +51,7 @@ class Language(models.Model):
     """Model representing a Language (e.g. English, French, Japanese, etc.)"""
     name = models.CharField(max_length=200,
                             help_text="Enter the book's natural language (e.g. English, French, Japanese etc.)")
+    updated_at = models.DateTimeField(auto_now=True)  # Used to build the ETag of the list view
 
     class Meta:
         ordering = ['name']
@@ -91,6 +93,11 @@ get_absolute_url() returns a URL that can be used to access a detail record for
 have to define a URL mapping that has the name book-detail, and define an associated view and template).
 """
 from django.urls import reverse  # Used to generate URLs by reversing the URL patterns
+from django.core.validators import RegexValidator
+from django.db.models import Q
+
+# An ISBN-10 (whose check digit may be an X) or an ISBN-13, without separators.
+ISBN_REGEX = r'^([0-9]{9}[0-9X]|[0-9]{13})$'
 
 
 class Book(models.Model):
@@ -101,15 +108,26 @@ class Book(models.Model):
     # Author as a string rather than object because it hasn't been declared yet in the file.
     summary = models.TextField(max_length=3000, blank=True, help_text="Enter a brief description of the book")
     isbn = models.CharField('ISBN', max_length=13, blank=True,
+                            validators=[RegexValidator(ISBN_REGEX, 'Enter a 10 or 13 character ISBN, without hyphens or spaces.')],
                             help_text='10 or 13 Characters <a href="https://www.isbn-international.org/content/what'
                                       '-isbn" target="_blank">ISBN number</a>')
     genre = models.ManyToManyField(Genre, help_text="Select a genre for this book")
     # ManyToManyField used because genre can contain many books. Books can cover many genres.
     # Genre class has already been defined so we can specify the object above.
     language = models.ForeignKey('Language', on_delete=models.SET_NULL, null=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Used to build the ETag of the list view
 
     class Meta:
-        ordering = ['title', 'author']
+        ordering = ['title', 'author_id']
+        indexes = [
+            # Matches the default ordering, so paginated lists are read in index order instead of being sorted.
+            models.Index(fields=['title', 'author'], name='book_title_author_idx'),
+            models.Index(fields=['isbn'], name='book_isbn_idx'),
+        ]
+        constraints = [
+            # Enforced by the database as well, so rows written without going through a form are checked too.
+            models.CheckConstraint(check=Q(isbn='') | Q(isbn__regex=ISBN_REGEX), name='book_isbn_format'),
+        ]
         permissions = (
             ("can_create_book", "Create book"),
             ("can_update_book", "Update book"),
@@ -118,7 +136,11 @@ class Book(models.Model):
 
     def display_genre(self):
         """Creates a string for the Genre. This is required to display genre in Admin."""
-        return ', '.join([genre.name for genre in self.genre.all()[:3]])
+        # The admin prefetches the genres into prefetched_genres; slicing genre.all() would query them again.
+        genres = getattr(self, 'prefetched_genres', None)
+        if genres is None:
+            genres = self.genre.all()[:3]
+        return ', '.join([genre.name for genre in genres[:3]])
 
     display_genre.short_description = 'Genre'
 
@@ -160,6 +182,26 @@ import uuid  # Required for unique book instances
 from datetime import date
 from django.contrib.auth.models import User  # Required to assign User as a borrower
 from django.db.models import F  # Required to use query expressions
+from django.db.models import Case, Value, When
+
+
+class BookInstanceQuerySet(models.QuerySet):
+    """QuerySet adding BookInstance specific helpers."""
+
+    def annotate_overdue(self):
+        """Annotates every copy with `overdue`, the database-computed equivalent of BookInstance.is_overdue."""
+        return self.annotate(overdue=Case(
+            When(due_back__lt=date.today(), then=Value(True)),
+            default=Value(False),
+            output_field=models.BooleanField()))
+
+    def stream(self, chunk_size=2000):
+        """Iterates over the copies without caching the whole result set in memory.
+
+        Use this for unpaginated scans (exports, reports, management commands). On PostgreSQL the rows are streamed
+        from a server-side cursor, chunk_size rows at a time.
+        """
+        return self.iterator(chunk_size=chunk_size)
 
 
 class BookInstance(models.Model):
@@ -171,6 +213,8 @@ class BookInstance(models.Model):
     due_back = models.DateField(null=True, blank=True, help_text='Enter the date in the form of yyyy-mm-dd')
     borrower = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
 
+    objects = BookInstanceQuerySet.as_manager()
+
     @property
     def is_overdue(self):
         if self.due_back and date.today() > self.due_back:
@@ -188,6 +232,12 @@ class BookInstance(models.Model):
 
     class Meta:
         ordering = [F('due_back').asc(nulls_last=True)]
+        indexes = [
+            # A borrower's books on loan, ordered by due date (LoanedBooksByUserListView).
+            models.Index(fields=['borrower', 'status', 'due_back'], name='bi_borr_stat_due_idx'),
+            # Default ordering, used by the list of all bookinstances.
+            models.Index(fields=['due_back'], name='bi_due_idx'),
+        ]
         permissions = (
             ("can_mark_returned", "Set book as returned"),
             ("can_create_bookinstance", "Create bookinstance"),
@@ -197,7 +247,8 @@ class BookInstance(models.Model):
 
     def __str__(self):
         """String for representing the Model object"""
-        return '{0} ({1})'.format(self.id, self.book.title)
+        # The book is optional (set to NULL when it is deleted).
+        return f'{self.id} ({self.book.title})' if self.book_id else str(self.id)
 
 
 """
@@ -216,9 +267,14 @@ class Author(models.Model):
     date_of_birth = models.DateField(null=True, blank=True, help_text='Enter the date in the form of yyyy-mm-dd')
     date_of_death = models.DateField('Died', null=True, blank=True,
                                      help_text='Enter the date in the form of yyyy-mm-dd')
+    updated_at = models.DateTimeField(auto_now=True)  # Used to build the ETag of the list views
 
     class Meta:
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Matches the default ordering, so paginated lists are read in index order instead of being sorted.
+            models.Index(fields=['last_name', 'first_name'], name='author_name_idx'),
+        ]
         permissions = (
             ("can_create_author", "Create author"),
             ("can_update_author", "Update author"),
@@ -231,7 +287,141 @@ class Author(models.Model):
 
     def __str__(self):
         """String for representing the Model object."""
-        return '{0} {1}'.format(self.first_name, self.last_name)
+        return f'{self.first_name} {self.last_name}'
+
+
+"""
+Home page counts
+
+Counting whole tables on every visit of the home page gets slower as the catalog grows, so the counts are kept in the 
+Counter model instead (one row per count, e.g. num_books). INDEX_COUNTERS declares which model and filter each count 
+is made of. Whenever a counted model is saved or deleted, the signal handlers below check whether the stored row 
+matched each filter before and after the write, and adjust the counters by the difference. The index view additionally 
+caches the counter values, so the cache is dropped whenever a counter changes.
+
+Note that bulk QuerySet.update() and bulk_create() calls don't send signals and so bypass the counters. Use 
+rebuild_counters() (or `python manage.py rebuild_counters`) to recompute them after such writes.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+
+class Counter(models.Model):
+    """Model storing a precomputed count shown on the home page (see INDEX_COUNTERS, and the visits in index())."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.IntegerField(default=0)
+
+    def __str__(self):
+        """String for representing the Model object."""
+        return f'{self.name}: {self.value}'
+
+
+INDEX_COUNTERS = {
+    'num_books': (Book, None),
+    'num_thrones_books': (Book, Q(title__icontains='thrones')),
+    'num_instances': (BookInstance, None),
+    'num_instances_available': (BookInstance, Q(status__exact='a')),
+    'num_authors': (Author, None),
+    'num_fantasy_genres': (Genre, Q(name__icontains='fantasy')),
+}
+
+INDEX_COUNTS_CACHE_KEY = 'catalog:index_counts'
+
+
+def stored_counts(instance):
+    """Returns, for each counter of the instance's model, whether its stored row is counted (1) or not (0)."""
+    counts = {name: Count('pk', filter=condition)
+              for name, (model, condition) in INDEX_COUNTERS.items() if isinstance(instance, model)}
+    if instance.pk is None:
+        return {name: 0 for name in counts}
+    return type(instance)._default_manager.filter(pk=instance.pk).aggregate(**counts)
+
+
+def invalidate_index_counts():
+    """Drops the cached home page counts once the current transaction is committed.
+
+    Dropping them earlier would let a concurrent request cache the counts from before the transaction again.
+    """
+    transaction.on_commit(lambda: cache.delete(INDEX_COUNTS_CACHE_KEY))
+
+
+def rebuild_counters(names=None):
+    """Recomputes the given counters (all by default) from the catalog, creating any missing Counter row.
+
+    Returns a dict mapping the counter names to their new values.
+    """
+    values = {}
+    for name, (model, condition) in INDEX_COUNTERS.items():
+        if names is not None and name not in names:
+            continue
+        queryset = model.objects.all() if condition is None else model.objects.filter(condition)
+        values[name] = queryset.count()
+        Counter.objects.update_or_create(name=name, defaults={'value': values[name]})
+    invalidate_index_counts()
+    return values
+
+
+def update_counters(before, after):
+    """Adds the difference between two stored_counts() results to the counters."""
+    changed = False
+    missing = []
+    for name, value in before.items():
+        delta = after.get(name, 0) - value
+        if delta:
+            if not Counter.objects.filter(name=name).update(value=F('value') + delta):
+                missing.append(name)
+            changed = True
+    if missing:
+        # The counter row doesn't exist (e.g. after a flush), so count from scratch, which includes this write.
+        rebuild_counters(missing)
+    elif changed:
+        invalidate_index_counts()
+
+
+def remember_stored_counts(sender, instance, **kwargs):
+    instance._stored_counts = stored_counts(instance)
+
+
+def count_saved(sender, instance, **kwargs):
+    update_counters(instance._stored_counts, stored_counts(instance))
+
+
+def count_deleted(sender, instance, **kwargs):
+    update_counters(instance._stored_counts, {})
+
+
+for counted_model in {model for model, condition in INDEX_COUNTERS.values()}:
+    pre_save.connect(remember_stored_counts, sender=counted_model)
+    post_save.connect(count_saved, sender=counted_model)
+    pre_delete.connect(remember_stored_counts, sender=counted_model)
+    post_delete.connect(count_deleted, sender=counted_model)
+
+
+"""
+List view ETags
+
+The list views build their ETag from a version string of each model they display (see list_etag() in views.py). 
+Computing a version takes a MAX/COUNT over the whole table, so the versions are cached, and dropped whenever a row of 
+the model is saved or deleted. Writes that don't send signals are picked up once the cached version expires.
+"""
+LIST_VERSION_TIMEOUT = 300
+
+
+def list_version_cache_key(model):
+    """Returns the cache key of the list version of the given model."""
+    return f'catalog:list_version:{model._meta.label_lower}'
+
+
+def invalidate_list_version(sender, **kwargs):
+    """Drops the cached list version of the sender model once the current transaction is committed."""
+    transaction.on_commit(lambda: cache.delete(list_version_cache_key(sender)))
+
+
+for listed_model in (Book, Author, Genre, Language):
+    post_save.connect(invalidate_list_version, sender=listed_model)
+    post_delete.connect(invalidate_list_version, sender=listed_model)
 
 
 """
@@ -0,0 +1,69 @@
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator using the planner's row estimate instead of COUNT(*) for large, unfiltered tables on PostgreSQL.
+
+    Counting every row of a table is O(N), and the default Paginator does it on each request to work out the number
+    of pages. For unfiltered querysets on PostgreSQL, pg_class.reltuples (kept up to date by VACUUM/ANALYZE) is used
+    instead once the table is larger than ESTIMATE_THRESHOLD rows, where an approximate page count is good enough.
+    Everything else falls back to the exact count.
+
+    The estimate lags behind the table, so pages past it aren't rejected. Pages before the estimated end are fetched
+    with one extra row to tell whether more rows follow; near or past the end, the exact count is used instead.
+    """
+    ESTIMATE_THRESHOLD = 10000
+    count_is_estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = self._estimated_count()
+        if estimate is not None and estimate > self.ESTIMATE_THRESHOLD:
+            self.count_is_estimated = True
+            return estimate
+        return super().count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # There may still be rows past the estimated end; page() checks them against the exact count.
+            if self.count_is_estimated and int(number) > 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_is_estimated and number < self.num_pages:
+            bottom = (number - 1) * self.per_page
+            top = bottom + self.per_page
+            object_list = list(self.object_list[bottom:top + self.orphans + 1])
+            if len(object_list) > self.per_page + self.orphans:
+                return self._get_page(object_list[:self.per_page], number, self)
+        if self.count_is_estimated:
+            # This is (or is past) the last page, so the estimate may be off either way.
+            self._use_exact_count()
+        return super().page(number)
+
+    def _use_exact_count(self):
+        """Replaces the estimated count by the exact one."""
+        self.count = Paginator.count.func(self)
+        self.count_is_estimated = False
+        self.__dict__.pop('num_pages', None)
+
+    def _estimated_count(self):
+        """Returns the estimated number of rows of the object list's table, or None if it can't be estimated."""
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where or query.distinct or query.is_sliced:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                           [self.object_list.model._meta.db_table])
+            row = cursor.fetchone()
+        # reltuples is -1 for tables that have never been analyzed.
+        return row[0] if row and row[0] >= 0 else None
@@ -17,6 +17,10 @@ class RenewBookFormTest(TestCase):
         form = RenewBookForm()
         self.assertEqual(form.fields['renewal_date'].help_text,'Enter a date between now and 4 weeks (default 3).')
 
+    def test_renew_form_date_field_initial_is_three_weeks_ahead(self):
+        form = RenewBookForm()
+        self.assertEqual(form['renewal_date'].initial, datetime.date.today() + datetime.timedelta(weeks=3))
+
     def test_renew_form_date_in_past(self):
         date = datetime.date.today() - datetime.timedelta(days=1)
         form_data = {'renewal_date': date}
@@ -48,3 +48,165 @@ class AuthorModelTest(TestCase):
         author = Author.objects.get(id=1)
         # This will also fail if the urlconf is not defined.
         self.assertEquals(author.get_absolute_url(), '/catalog/author/1')
+
+
+# Home page counters
+from django.core.management import call_command
+from io import StringIO
+from catalog.models import Book, BookInstance, Counter, Genre, rebuild_counters
+
+
+class CounterTest(TestCase):
+
+    def assertCounters(self, **expected):
+        counters = dict(Counter.objects.filter(name__in=expected).values_list('name', 'value'))
+        self.assertEqual(counters, expected)
+
+    def test_book_counters(self):
+        book = Book.objects.create(title='A Game of Thrones')
+        Book.objects.create(title='A Clash of Kings')
+        self.assertCounters(num_books=2, num_thrones_books=1)
+
+        # Renaming out of and back into the filter
+        book.title = 'A Game of Kings'
+        book.save()
+        self.assertCounters(num_books=2, num_thrones_books=0)
+        book.title = 'The Thrones Strike Back'
+        book.save()
+        self.assertCounters(num_books=2, num_thrones_books=1)
+
+        # Saving without a change doesn't count the book again
+        book.save()
+        self.assertCounters(num_books=2, num_thrones_books=1)
+
+        book.delete()
+        self.assertCounters(num_books=1, num_thrones_books=0)
+
+    def test_bookinstance_counters(self):
+        book = Book.objects.create(title='Book Title')
+        copy = BookInstance.objects.create(book=book, imprint='Unlikely Imprint, 2016', status='m')
+        BookInstance.objects.create(book=book, imprint='Unlikely Imprint, 2016', status='a')
+        self.assertCounters(num_instances=2, num_instances_available=1)
+
+        # Status changes to and from 'a'
+        copy.status = 'a'
+        copy.save()
+        self.assertCounters(num_instances=2, num_instances_available=2)
+        copy.status = 'o'
+        copy.save()
+        self.assertCounters(num_instances=2, num_instances_available=1)
+
+        copy.delete()
+        self.assertCounters(num_instances=1, num_instances_available=1)
+
+    def test_author_counter(self):
+        author = Author.objects.create(first_name='Big', last_name='Bob')
+        self.assertCounters(num_authors=1)
+        author.last_name = 'Bobby'
+        author.save()
+        self.assertCounters(num_authors=1)
+        author.delete()
+        self.assertCounters(num_authors=0)
+
+    def test_genre_counter(self):
+        genre = Genre.objects.create(name='Fantasy')
+        Genre.objects.create(name='Science Fiction')
+        self.assertCounters(num_fantasy_genres=1)
+        genre.name = 'Horror'
+        genre.save()
+        self.assertCounters(num_fantasy_genres=0)
+        genre.name = 'Dark fantasy'
+        genre.save()
+        self.assertCounters(num_fantasy_genres=1)
+        genre.delete()
+        self.assertCounters(num_fantasy_genres=0)
+
+    def test_missing_counter_is_recreated_on_write(self):
+        Book.objects.create(title='A Game of Thrones')
+        Counter.objects.all().delete()
+
+        Book.objects.create(title='A Clash of Kings')
+        self.assertCounters(num_books=2)
+
+    def test_rebuild_counters_fixes_drift(self):
+        Book.objects.create(title='A Game of Thrones')
+        Genre.objects.create(name='Fantasy')
+        # Bulk updates bypass the counters.
+        Book.objects.update(title='A Clash of Kings')
+        Counter.objects.filter(name='num_authors').delete()
+
+        values = rebuild_counters()
+        self.assertEqual(values['num_thrones_books'], 0)
+        self.assertCounters(num_books=1, num_thrones_books=0, num_instances=0, num_instances_available=0,
+                            num_authors=0, num_fantasy_genres=1)
+
+    def test_rebuild_counters_command(self):
+        Book.objects.create(title='A Game of Thrones')
+        Counter.objects.filter(name='num_books').update(value=42)
+
+        out = StringIO()
+        call_command('rebuild_counters', stdout=out)
+        self.assertIn('num_books: 1', out.getvalue())
+        self.assertCounters(num_books=1)
+
+
+import datetime
+
+
+class BookInstanceOverdueTest(TestCase):
+
+    def test_overdue_annotation_matches_is_overdue(self):
+        book = Book.objects.create(title='Book Title')
+        today = datetime.date.today()
+        due_dates = {
+            'past': today - datetime.timedelta(days=1),
+            'today': today,
+            'future': today + datetime.timedelta(days=1),
+            'none': None,
+        }
+        copies = {label: BookInstance.objects.create(book=book, imprint=label, due_back=due_back)
+                  for label, due_back in due_dates.items()}
+
+        overdue = dict(BookInstance.objects.annotate_overdue().values_list('imprint', 'overdue'))
+        self.assertEqual(overdue, {'past': True, 'today': False, 'future': False, 'none': False})
+        for label, copy in copies.items():
+            self.assertEqual(overdue[label], copy.is_overdue)
+
+
+# Book ISBN
+import importlib
+from unittest import mock
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+
+class BookIsbnTest(TestCase):
+
+    def test_isbn_validator(self):
+        field = Book._meta.get_field('isbn')
+        for valid in ('0306406152', '080442957X', '9780306406157', ''):
+            self.assertEqual(field.clean(valid, None), valid)
+        for invalid in ('0-306-40615-2', '080442957x', '030640615', '978030640615', 'ABCDEFG'):
+            with self.assertRaises(ValidationError):
+                field.clean(invalid, None)
+
+    def test_isbn_constraint(self):
+        Book.objects.create(title='Book Title', isbn='080442957X')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Book.objects.create(title='Book Title', isbn='0-306-40615-2')
+
+    def test_migration_normalizes_existing_isbns(self):
+        migration = importlib.import_module('catalog.migrations.0009_book_isbn_format')
+        self.assertEqual(migration.normalize_isbn('0-306-40615-2'), '0306406152')
+        self.assertEqual(migration.normalize_isbn('0 8044 2957 x'), '080442957X')
+        self.assertEqual(migration.normalize_isbn('9780306406157'), '9780306406157')
+
+    def test_migration_lists_invalid_isbns_instead_of_dropping_them(self):
+        migration = importlib.import_module('catalog.migrations.0009_book_isbn_format')
+        books = [Book(pk=1, isbn='0-306-40615-2'), Book(pk=2, isbn='ABCDEFG'), Book(pk=3, isbn='0-306-4061')]
+        apps = mock.Mock()
+        apps.get_model.return_value.objects.exclude.return_value.exclude.return_value.only.return_value = books
+
+        with self.assertRaisesMessage(ValueError, "2: 'ABCDEFG'\n3: '0-306-4061'"):
+            migration.normalize_isbns(apps, None)
+        apps.get_model.return_value.objects.filter.assert_not_called()
@@ -0,0 +1,90 @@
+from django.test import TestCase
+
+# Create your tests here.
+from unittest import mock
+from django.core.paginator import EmptyPage
+from django.db import connection
+from catalog.models import Author
+from catalog.paginators import EstimatedCountPaginator
+
+
+class EstimatedCountPaginatorTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for author_num in range(3):
+            Author.objects.create(first_name='Christian %s' % author_num, last_name='Surname %s' % author_num)
+
+    def test_no_estimate_on_sqlite(self):
+        paginator = EstimatedCountPaginator(Author.objects.all(), 10)
+        self.assertEqual(paginator._estimated_count(), None)
+        self.assertEqual(paginator.count, 3)
+
+    def test_no_estimate_for_filtered_sliced_or_distinct_querysets(self):
+        querysets = [
+            Author.objects.filter(first_name__startswith='Christian'),
+            Author.objects.all()[:2],
+            Author.objects.distinct(),
+        ]
+        # Pretend to be on PostgreSQL: these must return before querying pg_class.
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            for queryset in querysets:
+                self.assertEqual(EstimatedCountPaginator(queryset, 10)._estimated_count(), None)
+
+    def test_no_estimate_for_lists(self):
+        self.assertEqual(EstimatedCountPaginator(list(range(5)), 10)._estimated_count(), None)
+
+    def test_exact_count_below_threshold(self):
+        paginator = EstimatedCountPaginator(Author.objects.all(), 10)
+        with mock.patch.object(paginator, '_estimated_count', return_value=paginator.ESTIMATE_THRESHOLD):
+            self.assertEqual(paginator.count, 3)
+
+    def test_estimate_above_threshold(self):
+        paginator = EstimatedCountPaginator(Author.objects.all(), 10)
+        estimate = paginator.ESTIMATE_THRESHOLD + 1
+        with mock.patch.object(paginator, '_estimated_count', return_value=estimate):
+            self.assertEqual(paginator.count, estimate)
+            self.assertEqual(paginator.num_pages, 1001)
+
+    def estimated_paginator(self, estimate, per_page=1):
+        paginator = EstimatedCountPaginator(Author.objects.all(), per_page)
+        paginator.ESTIMATE_THRESHOLD = 0
+        patcher = mock.patch.object(paginator, '_estimated_count', return_value=estimate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return paginator
+
+    def test_pages_past_low_estimate_are_served(self):
+        paginator = self.estimated_paginator(1)
+        self.assertEqual(paginator.num_pages, 1)
+
+        page = paginator.page(3)
+        self.assertEqual([author.first_name for author in page], ['Christian 2'])
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(page.has_next())
+
+        paginator = self.estimated_paginator(1)
+        self.assertTrue(paginator.page(2).has_next())
+
+    def test_pages_before_estimated_end_are_not_counted(self):
+        paginator = self.estimated_paginator(2)
+        with self.assertNumQueries(1):
+            page = paginator.page(1)
+            self.assertEqual(len(page), 1)
+        self.assertTrue(page.has_next())
+        self.assertTrue(paginator.count_is_estimated)
+
+    def test_short_page_before_high_estimate_ends_the_list(self):
+        paginator = self.estimated_paginator(10, per_page=2)
+        page = paginator.page(2)
+        self.assertEqual([author.first_name for author in page], ['Christian 2'])
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(page.has_next())
+
+    def test_pages_past_high_estimate_are_empty(self):
+        paginator = self.estimated_paginator(10)
+        self.assertFalse(paginator.page(3).has_next())
+        with self.assertRaises(EmptyPage):
+            paginator.page(4)
+        with self.assertRaises(EmptyPage):
+            self.estimated_paginator(10).page(11)
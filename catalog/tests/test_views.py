@@ -47,7 +47,7 @@ class AuthorListViewTest(TestCase):
 # Loaned Book Instances By User List View Test
 import datetime
 from django.utils import timezone
-from catalog.models import BookInstance, Book, Genre, Language
+from catalog.models import BookInstance, Book, Counter, Genre, Language
 from django.contrib.auth.models import User  # Required to assign User as a borrower
 
 
@@ -64,7 +64,7 @@ class LoanedBookInstancesByUserListViewTest(TestCase):
         test_author = Author.objects.create(first_name='John', last_name='Smith')
         test_genre = Genre.objects.create(name='Fantasy')
         test_language = Language.objects.create(name='English')
-        test_book = Book.objects.create(title='Book Title', summary='My book summary', isbn='ABCDEFG',
+        test_book = Book.objects.create(title='Book Title', summary='My book summary', isbn='9781234567897',
                                         author=test_author, language=test_language)
         # Create genre as a post-step
         genre_objects_for_book = Genre.objects.all()
@@ -180,7 +180,7 @@ class RenewBookInstancesViewTest(TestCase):
         test_author = Author.objects.create(first_name='John', last_name='Smith')
         test_genre = Genre.objects.create(name='Fantasy')
         test_language = Language.objects.create(name='English')
-        test_book = Book.objects.create(title='Book Title', summary='My book summary', isbn='ABCDEFG',
+        test_book = Book.objects.create(title='Book Title', summary='My book summary', isbn='9781234567897',
                                         author=test_author, language=test_language, )
         # Create genre as a post-step
         genre_objects_for_book = Genre.objects.all()
@@ -246,7 +246,7 @@ class RenewBookInstancesViewTest(TestCase):
         self.assertEqual(resp.status_code, 200)
 
         date_3_weeks_in_future = datetime.date.today() + datetime.timedelta(weeks=3)
-        self.assertEqual(resp.context['form'].initial['renewal_date'], date_3_weeks_in_future)
+        self.assertEqual(resp.context['form']['renewal_date'].initial, date_3_weeks_in_future)
 
     def test_redirects_to_all_borrowed_book_list_on_success(self):
         login = self.client.login(username='testuser2', password='12345')
@@ -270,3 +270,278 @@ class RenewBookInstancesViewTest(TestCase):
                                 {'renewal_date': invalid_date_in_future})
         self.assertEqual(resp.status_code, 200)
         self.assertFormError(resp, 'form', 'renewal_date', 'Invalid date - renewal more than 4 weeks ahead')
+
+
+# Index View Test
+import time
+from unittest import mock
+from django.core.cache import cache
+
+
+class IndexViewTest(TestCase):
+
+    def setUp(self):
+        # The cached counts and ETag versions outlive the test transactions.
+        cache.clear()
+        self.test_user1 = User.objects.create_user(username='testuser1', password='12345')
+        self.test_user1.save()
+        test_user2 = User.objects.create_user(username='testuser2', password='12345')
+        test_user2.save()
+
+    def test_redirect_if_not_logged_in(self):
+        resp = self.client.get(reverse('index'))
+        self.assertRedirects(resp, '/accounts/login/?next=/catalog/')
+
+    def test_num_visits_counts_previous_visits_of_user(self):
+        login = self.client.login(username='testuser1', password='12345')
+        for expected_visits in range(3):
+            resp = self.client.get(reverse('index'))
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.context['num_visits'], expected_visits)
+
+        # Visits are counted per user.
+        self.client.logout()
+        login = self.client.login(username='testuser2', password='12345')
+        resp = self.client.get(reverse('index'))
+        self.assertEqual(resp.context['num_visits'], 0)
+
+    def test_num_visits_do_not_expire(self):
+        login = self.client.login(username='testuser1', password='12345')
+        for expected_visits in range(3):
+            resp = self.client.get(reverse('index'))
+        self.assertEqual(resp.context['num_visits'], 2)
+
+        # Come back after the default cache timeout of 300 seconds.
+        later = time.time() + 360
+        with mock.patch('time.time', return_value=later):
+            resp = self.client.get(reverse('index'))
+        self.assertEqual(resp.context['num_visits'], 3)
+        self.assertEqual(Counter.objects.get(name=f'visits:u:{self.test_user1.id}').value, 4)
+
+    def test_counts_reflect_catalog_writes(self):
+        login = self.client.login(username='testuser1', password='12345')
+        resp = self.client.get(reverse('index'))
+        self.assertEqual(resp.context['num_books'], 0)
+        self.assertEqual(resp.context['num_thrones_books'], 0)
+
+        # The cached counts are dropped once the write is committed.
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title='A Game of Thrones')
+        resp = self.client.get(reverse('index'))
+        self.assertEqual(resp.context['num_books'], 1)
+        self.assertEqual(resp.context['num_thrones_books'], 1)
+
+    def test_missing_counters_are_rebuilt(self):
+        Book.objects.create(title='A Game of Thrones')
+        Counter.objects.all().delete()
+
+        login = self.client.login(username='testuser1', password='12345')
+        resp = self.client.get(reverse('index'))
+        self.assertEqual(resp.context['num_books'], 1)
+        self.assertTrue(Counter.objects.filter(name='num_books', value=1).exists())
+
+
+# List View ETag Test
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class ListViewETagTest(TestCase):
+
+    def setUp(self):
+        # The cached counts and ETag versions outlive the test transactions.
+        cache.clear()
+        test_user1 = User.objects.create_user(username='testuser1', password='12345')
+        test_user1.save()
+        self.test_author = Author.objects.create(first_name='John', last_name='Smith')
+        self.test_book = Book.objects.create(title='Book Title', author=self.test_author)
+
+    def test_no_etag_if_not_logged_in(self):
+        resp = self.client.get(reverse('books'))
+        self.assertRedirects(resp, '/accounts/login/?next=/catalog/books/')
+        self.assertFalse(resp.has_header('ETag'))
+
+    def test_matching_etag_gives_not_modified(self):
+        login = self.client.login(username='testuser1', password='12345')
+        resp = self.client.get(reverse('books'))
+        self.assertEqual(resp.status_code, 200)
+
+        resp = self.client.get(reverse('books'), HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_revalidation_reads_cached_versions(self):
+        login = self.client.login(username='testuser1', password='12345')
+        resp = self.client.get(reverse('books'))
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse('books'), HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 304)
+        for query in queries.captured_queries:
+            self.assertNotIn('MAX(', query['sql'])
+            self.assertNotIn('COUNT(', query['sql'])
+
+    def test_etag_changes_after_edit_of_displayed_model(self):
+        login = self.client.login(username='testuser1', password='12345')
+        old_etag = self.client.get(reverse('books'))['ETag']
+
+        # The book list shows the author names.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.test_author.last_name = 'Smithers'
+            self.test_author.save()
+        resp = self.client.get(reverse('books'), HTTP_IF_NONE_MATCH=old_etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], old_etag)
+
+    def test_etag_changes_after_delete(self):
+        login = self.client.login(username='testuser1', password='12345')
+        old_etag = self.client.get(reverse('books'))['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.test_book.delete()
+        resp = self.client.get(reverse('books'), HTTP_IF_NONE_MATCH=old_etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], old_etag)
+
+
+# List View Query Count Test
+class ListViewQueryCountTest(TestCase):
+    """The number of queries of the list views must not grow with the number of rows on the page."""
+
+    def setUp(self):
+        # The cached counts and ETag versions outlive the test transactions.
+        cache.clear()
+        test_user1 = User.objects.create_user(username='testuser1', password='12345')
+        test_user1.user_permissions.add(Permission.objects.get(name='Set book as returned'))
+        test_user1.save()
+
+        test_language = Language.objects.create(name='English')
+        for book_num in range(10):
+            test_author = Author.objects.create(first_name='John %s' % book_num, last_name='Smith')
+            test_genre = Genre.objects.create(name='Genre %s' % book_num)
+            test_book = Book.objects.create(title='Book Title %s' % book_num, author=test_author,
+                                            language=test_language)
+            test_book.genre.set([test_genre])
+            BookInstance.objects.create(book=test_book, imprint='Unlikely Imprint, 2016', status='o',
+                                        due_back=datetime.date.today() + datetime.timedelta(days=book_num - 5),
+                                        borrower=test_user1)
+
+        login = self.client.login(username='testuser1', password='12345')
+
+    def assertListQueries(self, url_name, num):
+        # Warm the cached ETag versions first.
+        self.client.get(reverse(url_name))
+        with self.assertNumQueries(num):
+            resp = self.client.get(reverse(url_name))
+            self.assertEqual(resp.status_code, 200)
+            # Render the page within the block, so that queries made by the template are counted too.
+            resp.content
+
+    # Session, user and (where permissions are checked) the user and group permissions come first; then the list
+    # views run the paginator's count and the page itself.
+    def test_book_list(self):
+        self.assertListQueries('books', 6)
+
+    def test_author_list(self):
+        self.assertListQueries('authors', 6)
+
+    def test_genre_list(self):
+        self.assertListQueries('genres', 6)
+
+    def test_language_list(self):
+        self.assertListQueries('languages', 6)
+
+    def test_borrowed_list(self):
+        self.assertListQueries('my-borrowed', 4)
+
+    def test_all_bookinstances_list(self):
+        self.assertListQueries('all-bookinstances', 6)
+
+
+# Book Create/Update View Test
+from catalog.forms import BookForm
+
+
+class BookCreateUpdateViewTest(TestCase):
+
+    def setUp(self):
+        test_user1 = User.objects.create_user(username='testuser1', password='12345')
+        for codename in ('can_create_book', 'can_update_book'):
+            test_user1.user_permissions.add(Permission.objects.get(codename=codename))
+        test_user1.save()
+
+        self.test_author = Author.objects.create(first_name='John', last_name='Smith')
+        self.test_language = Language.objects.create(name='English')
+        self.test_genre1 = Genre.objects.create(name='Fantasy')
+        self.test_genre2 = Genre.objects.create(name='Horror')
+        self.client.login(username='testuser1', password='12345')
+
+    def book_data(self, **data):
+        book_data = {'title': 'Book Title', 'author': self.test_author.pk, 'summary': 'My book summary',
+                     'isbn': '9781234567897', 'genre': [self.test_genre1.pk], 'language': self.test_language.pk}
+        book_data.update(data)
+        return book_data
+
+    def test_create_uses_book_form(self):
+        resp = self.client.get(reverse('book-create'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIsInstance(resp.context['form'], BookForm)
+
+    def test_create_saves_genres(self):
+        resp = self.client.post(reverse('book-create'), self.book_data())
+        self.assertRedirects(resp, reverse('books'))
+
+        book = Book.objects.get(title='Book Title')
+        self.assertEqual(list(book.genre.all()), [self.test_genre1])
+
+    def test_update_uses_book_form(self):
+        test_book = Book.objects.create(title='Book Title', author=self.test_author, language=self.test_language)
+        resp = self.client.get(reverse('book-update', kwargs={'pk': test_book.pk}))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIsInstance(resp.context['form'], BookForm)
+
+    def test_update_saves_genres(self):
+        test_book = Book.objects.create(title='Book Title', author=self.test_author, language=self.test_language)
+        test_book.genre.set([self.test_genre1])
+
+        resp = self.client.post(reverse('book-update', kwargs={'pk': test_book.pk}),
+                                self.book_data(title='New Title', genre=[self.test_genre2.pk]))
+        self.assertRedirects(resp, reverse('books'))
+
+        test_book.refresh_from_db()
+        self.assertEqual(test_book.title, 'New Title')
+        self.assertEqual(list(test_book.genre.all()), [self.test_genre2])
+
+
+# Author/Book Delete View Test
+class AuthorBookDeleteViewTest(TestCase):
+
+    def setUp(self):
+        test_user1 = User.objects.create_user(username='testuser1', password='12345')
+        for codename in ('can_delete_author', 'can_delete_book'):
+            test_user1.user_permissions.add(Permission.objects.get(codename=codename))
+        test_user1.save()
+
+        self.test_author = Author.objects.create(first_name='John', last_name='Smith')
+        self.test_book = Book.objects.create(title='Book Title', author=self.test_author)
+        self.test_bookinstance = BookInstance.objects.create(book=self.test_book, imprint='Unlikely Imprint, 2016')
+        self.client.login(username='testuser1', password='12345')
+
+    def test_delete_author_keeps_books_without_author(self):
+        resp = self.client.post(reverse('author-delete', kwargs={'pk': self.test_author.pk}))
+        self.assertRedirects(resp, reverse('authors'), fetch_redirect_response=False)
+
+        self.assertFalse(Author.objects.filter(pk=self.test_author.pk).exists())
+        self.test_book.refresh_from_db()
+        self.assertIsNone(self.test_book.author_id)
+
+    def test_delete_book_keeps_copies_without_book(self):
+        resp = self.client.post(reverse('book-delete', kwargs={'pk': self.test_book.pk}))
+        self.assertRedirects(resp, reverse('books'), fetch_redirect_response=False)
+
+        self.assertFalse(Book.objects.filter(pk=self.test_book.pk).exists())
+        self.test_bookinstance.refresh_from_db()
+        self.assertIsNone(self.test_bookinstance.book_id)
+
+    def test_HTTP404_for_invalid_author(self):
+        resp = self.client.post(reverse('author-delete', kwargs={'pk': self.test_author.pk + 1}))
+        self.assertEqual(resp.status_code, 404)
@@ -1,60 +1,104 @@
-from django.shortcuts import render
+import hashlib
+
+from django.contrib.auth.decorators import login_required, permission_required
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max  # F is required to use query expressions
+from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import generic
+from django.views.decorators.http import etag
+from django.views.generic.edit import CreateView, UpdateView, DeleteView
 
 # Create your views here.
-from .models import Book, Author, BookInstance, Genre, Language
+from .forms import BookForm, RenewBookForm
+from .models import Book, Author, BookInstance, Genre, Language, Counter, INDEX_COUNTERS, INDEX_COUNTS_CACHE_KEY, \
+    LIST_VERSION_TIMEOUT, list_version_cache_key, rebuild_counters
+from .paginators import EstimatedCountPaginator
 
-from django.contrib.auth.decorators import login_required
+
+def _compute_index_counts():
+    """Returns the object counts shown on the home page."""
+    # The counts are maintained in the Counter table as the catalog is edited (see INDEX_COUNTERS in models.py), so
+    # this is a single indexed lookup rather than a COUNT over each table.
+    counts = dict(Counter.objects.filter(name__in=INDEX_COUNTERS).values_list('name', 'value'))
+    missing = [name for name in INDEX_COUNTERS if name not in counts]
+    if missing:
+        counts.update(rebuild_counters(missing))
+    return counts
 
 
 @login_required
 def index(request):
     """View function for home page of site."""
 
-    # Generate counts of some of the main objects
-    num_books = Book.objects.all().count()
-    num_instances = BookInstance.objects.all().count()
-
-    # Available books (status = 'a')
-    num_instances_available = BookInstance.objects.filter(status__exact='a').count()
-
-    # The 'all()' is implied by default.
-    num_authors = Author.objects.count()
-
-    # Number of visits to this view, as counted in the session variable.
-    num_visits = request.session.get('num_visits', 0)
-    request.session['num_visits'] = num_visits + 1
-
-    """
-    Challenge
-    Modify the view to generate counts for genres and books that contain a particular word (case insensitive), and 
-    pass the results to the context. You accomplish this in a similar way to creating and using num_books and 
-    num_instances_available. Then update the index template to include these variables.
-    """
-    num_fantasy_genres = Genre.objects.filter(name__icontains='fantasy').count()
-    num_thrones_books = Book.objects.filter(title__icontains='thrones').count()
+    # Number of previous visits to this view by the current user, kept in a Counter row of their own. This avoids
+    # rewriting the whole session on every hit, and the row lock makes concurrent visits count (and see) one each.
+    with transaction.atomic():
+        visits, created = Counter.objects.select_for_update().get_or_create(
+            name=f'visits:u:{request.user.id}', defaults={'value': 1})
+        if created:
+            num_visits = 0
+        else:
+            num_visits = visits.value
+            Counter.objects.filter(pk=visits.pk).update(value=F('value') + 1)
 
     context = {
-        'num_books': num_books,
-        'num_instances': num_instances,
-        'num_instances_available': num_instances_available,
-        'num_authors': num_authors,
-        'num_fantasy_genres': num_fantasy_genres,
-        'num_thrones_books': num_thrones_books,
         'num_visits': num_visits,
     }
+    # The counts only change when the catalog is edited (see INDEX_COUNTS_CACHE_KEY in models.py), so cache them
+    # rather than reading the counters on each visit.
+    context.update(cache.get_or_set(INDEX_COUNTS_CACHE_KEY, _compute_index_counts, 60))
 
     # Render the HTML template index.html with the data in the context variable
     return render(request, 'index.html', context=context)
 
 
-# Book List View
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views import generic
+def list_etag(*models):
+    """Returns an ETag function for a list view displaying the given models.
+
+    The ETag changes whenever a row of one of the models is added, updated or deleted, so browsers can revalidate
+    their copy of the page and get a 304 Not Modified instead of a re-rendered page. The pages also show the user name
+    and permission dependent links, so the user and their permissions are part of the ETag as well.
+    """
+
+    def list_etag_func(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return None
+        permissions = ','.join(sorted(request.user.get_all_permissions()))
+        parts = [str(request.user.pk), str(request.user.is_staff), hashlib.md5(permissions.encode()).hexdigest()]
+        # The model versions are cached (see LIST_VERSION_TIMEOUT in models.py), so that revalidating a page doesn't
+        # aggregate over the whole tables on every request.
+        keys = [list_version_cache_key(model) for model in models]
+        versions = cache.get_many(keys)
+        for model, key in zip(models, keys):
+            if key not in versions:
+                row = model.objects.aggregate(last_updated=Max('updated_at'), count=Count('pk'))
+                versions[key] = f"{row['last_updated']}-{row['count']}"
+                cache.set(key, versions[key], LIST_VERSION_TIMEOUT)
+            parts.append(versions[key])
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    return list_etag_func
 
 
+# Book List View
+@method_decorator(etag(list_etag(Book, Author)), name='dispatch')
 class BookListView(LoginRequiredMixin, generic.ListView):
     model = Book
     paginate_by = 10
+    paginator_class = EstimatedCountPaginator
+
+    def get_queryset(self):
+        # JOIN the author rather than fetching it separately for every book on the page. Only the columns the list
+        # shows are fetched (notably not the potentially long summary).
+        return (Book.objects
+                .select_related('author')
+                .only('id', 'title', 'author__first_name', 'author__last_name'))
 
 
 class BookDetailView(LoginRequiredMixin, generic.DetailView):
@@ -62,9 +106,11 @@ class BookDetailView(LoginRequiredMixin, generic.DetailView):
 
 
 # Author List View
+@method_decorator(etag(list_etag(Author)), name='dispatch')
 class AuthorListView(LoginRequiredMixin, generic.ListView):
     model = Author
     paginate_by = 10
+    paginator_class = EstimatedCountPaginator
 
 
 class AuthorDetailView(LoginRequiredMixin, generic.DetailView):
@@ -72,9 +118,11 @@ class AuthorDetailView(LoginRequiredMixin, generic.DetailView):
 
 
 # Genre List View
+@method_decorator(etag(list_etag(Genre)), name='dispatch')
 class GenreListView(LoginRequiredMixin, generic.ListView):
     model = Genre
     paginate_by = 10
+    paginator_class = EstimatedCountPaginator
 
 
 class GenreDetailView(LoginRequiredMixin, generic.DetailView):
@@ -82,9 +130,11 @@ class GenreDetailView(LoginRequiredMixin, generic.DetailView):
 
 
 # Language List View
+@method_decorator(etag(list_etag(Language)), name='dispatch')
 class LanguageListView(LoginRequiredMixin, generic.ListView):
     model = Language
     paginate_by = 10
+    paginator_class = EstimatedCountPaginator
 
 
 class LanguageDetailView(LoginRequiredMixin, generic.DetailView):
@@ -99,14 +149,15 @@ class LoanedBooksByUserListView(LoginRequiredMixin, generic.ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        return BookInstance.objects.filter(borrower=self.request.user).filter(status__exact='o').order_by('due_back')
+        return (BookInstance.objects
+                .select_related('book', 'book__author')
+                .defer('imprint', 'book__summary')
+                .annotate_overdue()
+                .filter(borrower=self.request.user, status__exact='o')
+                .order_by('due_back'))
 
 
 # Added as part of challenge!
-from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.db.models import F  # Required to use query expressions
-
-
 class BookinstancesAllListView(PermissionRequiredMixin, generic.ListView):
     """Generic class-based view listing all bookinstances. Only visible to users with can_mark_returned permission."""
     model = BookInstance
@@ -115,21 +166,16 @@ class BookinstancesAllListView(PermissionRequiredMixin, generic.ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        return BookInstance.objects.order_by(F('due_back').asc(nulls_last=True))
+        return (BookInstance.objects
+                .select_related('book', 'book__author', 'borrower')
+                .defer('imprint', 'book__summary')
+                .annotate_overdue()
+                .order_by(F('due_back').asc(nulls_last=True)))
 
 # Renew books
-from django.contrib.auth.decorators import permission_required
-from django.shortcuts import get_object_or_404
-from django.http import HttpResponseRedirect
-from django.urls import reverse
-import datetime
-from .forms import RenewBookForm
-
-
 @permission_required('catalog.can_mark_returned')
 def renew_book_librarian(request, pk):
     """View function for renewing a specific BookInstance by librarian"""
-    book_inst = get_object_or_404(BookInstance, pk=pk)
 
     # If this is a POST request then process the Form data
     if request.method == 'POST':
@@ -139,17 +185,21 @@ def renew_book_librarian(request, pk):
 
         # Check if the form is valid:
         if form.is_valid():
-            # process the data in form.cleaned_data as required (here we just write it to the model due_back field)
-            book_inst.due_back = form.cleaned_data['renewal_date']
-            book_inst.save()
+            # process the data in form.cleaned_data as required (here we just write it to the model due_back field).
+            # The instance isn't needed for this, so update the row directly instead of loading it and saving it back.
+            updated = BookInstance.objects.filter(pk=pk).update(due_back=form.cleaned_data['renewal_date'])
+            if not updated:
+                raise Http404('No BookInstance matches the given query.')
 
             # redirect to a new URL:
             return HttpResponseRedirect(reverse('all-bookinstances'))
 
     # If this is a GET (or any other method) create the default form.
     else:
-        proposed_renewal_date = datetime.date.today() + datetime.timedelta(weeks=3)
-        form = RenewBookForm(initial={'renewal_date': proposed_renewal_date, })
+        form = RenewBookForm()
+
+    # The template shows the book being renewed.
+    book_inst = get_object_or_404(BookInstance, pk=pk)
 
     return render(request, 'catalog/book_renew_librarian.html', {'form': form, 'bookinst': book_inst})
 
@@ -158,9 +208,6 @@ def renew_book_librarian(request, pk):
 Use generic editing views to create pages to add functionality to create, edit, and delete Author records from our 
 library — effectively providing a basic reimplementation of parts of the Admin site
 """
-from django.views.generic.edit import CreateView, UpdateView, DeleteView
-from django.urls import reverse_lazy
-from .models import Author
 
 
 class AuthorCreate(PermissionRequiredMixin, CreateView):
@@ -183,25 +230,37 @@ class AuthorDelete(PermissionRequiredMixin, DeleteView):
     permission_required = 'catalog.can_delete_author'
     success_url = reverse_lazy('authors')
 
+    def delete(self, request, *args, **kwargs):
+        """Unlinks the author's books with a single UPDATE before deleting the author.
+
+        Book.author is SET_NULL, for which the deletion collector would otherwise load every book of the author.
+        """
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        with transaction.atomic():
+            # QuerySet.update() skips auto_now, so bump updated_at explicitly to refresh the book list ETag.
+            Book.objects.filter(author=self.object).update(author=None, updated_at=timezone.now())
+            self.object.delete()
+        return HttpResponseRedirect(success_url)
+
 
 """
 Challenge! Use generic editing views to create pages to add functionality to create, edit, and delete Book records 
 from our library
 """
-from .models import Book
 
 
 class BookCreate(PermissionRequiredMixin, CreateView):
     model = Book
     permission_required = 'catalog.can_create_book'
-    fields = '__all__'
+    form_class = BookForm
     success_url = reverse_lazy('books')
 
 
 class BookUpdate(PermissionRequiredMixin, UpdateView):
     model = Book
     permission_required = 'catalog.can_update_book'
-    fields = '__all__'
+    form_class = BookForm
     success_url = reverse_lazy('books')
 
 
@@ -210,12 +269,23 @@ class BookDelete(PermissionRequiredMixin, DeleteView):
     permission_required = 'catalog.can_delete_book'
     success_url = reverse_lazy('books')
 
+    def delete(self, request, *args, **kwargs):
+        """Unlinks the book's copies with a single UPDATE before deleting the book.
+
+        BookInstance.book is SET_NULL, for which the deletion collector would otherwise load every copy of the book.
+        """
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        with transaction.atomic():
+            BookInstance.objects.filter(book=self.object).update(book=None)
+            self.object.delete()
+        return HttpResponseRedirect(success_url)
+
 
 """
 Use generic editing views to create pages to add functionality to create and delete BookInstance records 
 from our library.
 """
-from .models import BookInstance
 
 
 class BookInstanceCreate(PermissionRequiredMixin, CreateView):
@@ -242,7 +312,6 @@ class BookInstanceDelete(PermissionRequiredMixin, DeleteView):
 Use generic editing views to create pages to add functionality to create and delete Genre records 
 from our library.
 """
-from .models import Genre
 
 
 class GenreCreate(PermissionRequiredMixin, CreateView):
@@ -269,7 +338,6 @@ class GenreDelete(PermissionRequiredMixin, DeleteView):
 Use generic editing views to create pages to add functionality to create, edit, and delete Language records 
 from our library.
 """
-from .models import Language
 
 
 class LanguageCreate(PermissionRequiredMixin, CreateView):